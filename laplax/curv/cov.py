@@ -199,13 +199,13 @@ def create_diagonal_curvature(mv: CurvatureMV, layout: Layout, **kwargs) -> Flat
         mv: Matrix-vector product function representing the curvature.
         layout: Structure defining the parameter layout that is assumed by the
             matrix-vector product function.
-        **kwargs: Additional arguments (unused).
+        **kwargs: Additional arguments passed to `diagonal` (e.g.,
+            `diagonal_batch_size`).
 
     Returns:
         A 1D array representing the diagonal curvature.
     """
-    del kwargs
-    curv_diagonal = diagonal(mv, layout=layout)
+    curv_diagonal = diagonal(mv, layout=layout, **kwargs)
     return curv_diagonal
 
 
@@ -73,6 +73,12 @@ def _mse_hessian_mv(jv: PredArray, **kwargs) -> PredArray:
     return 2 * jv
 
 
+_LOSS_HESSIAN_MVS: dict[str, Callable] = {
+    LossFn.CROSSENTROPY: _cross_entropy_hessian_mv,
+    LossFn.MSE: _mse_hessian_mv,
+}
+
+
 def create_loss_hessian_mv(
     loss_fn: LossFn | str | Callable[[PredArray, TargetArray], Num[Array, "..."]],
 ) -> Callable:
@@ -93,13 +99,10 @@ def create_loss_hessian_mv(
     Returns:
         A function that computes the Hessian-vector product for the given loss function.
     """
-    if loss_fn == LossFn.CROSSENTROPY:
-        return _cross_entropy_hessian_mv
-
-    if loss_fn == LossFn.MSE:
-        return _mse_hessian_mv
+    if isinstance(loss_fn, str) and loss_fn in _LOSS_HESSIAN_MVS:
+        return _LOSS_HESSIAN_MVS[loss_fn]
 
-    if isinstance(loss_fn, Callable):
+    if callable(loss_fn):
 
         def custom_hessian_mv(
             jv: PredArray, pred: PredArray, target: TargetArray, **kwargs
@@ -3,11 +3,13 @@
 import jax
 import jax.numpy as jnp
 
-from laplax.enums import LossFn
+from laplax.enums import HVPMode, LossFn
 from laplax.types import (
     Array,
     Callable,
     Data,
+    DType,
+    FlatParams,
     Float,
     InputArray,
     Int,
@@ -17,7 +19,8 @@ from laplax.types import (
     PyTree,
     TargetArray,
 )
-from laplax.util.tree import mul
+from laplax.util.mv import diagonal
+from laplax.util.tree import add, mul, tree_slice, zeros_like
 
 
 def log_sigmoid_cross_entropy(
@@ -29,6 +32,10 @@ def log_sigmoid_cross_entropy(
     and the target values. The formula implemented is:
     -targets * log_sigmoid(logits) - (1 - targets) * log_sigmoid(-logits)
 
+    This is a standalone elementwise helper for binary targets, e.g., to build a
+    custom `loss_fn`. It is not used for `LossFn.CROSSENTROPY`, which computes the
+    summed softmax cross-entropy instead.
+
     Args:
         logits: The predicted logits before sigmoid activation
         targets: The target values (0 or 1)
@@ -56,11 +63,93 @@ def hvp(func: Callable, primals: PyTree, tangents: PyTree) -> PyTree:
     Returns:
         The Hessian-vector product.
     """
-    return jax.jvp(jax.grad(func), (primals,), (tangents,))[1]
+    return _jvp_of_grad(jax.grad(func), primals, tangents)
+
+
+def hvp_rev_over_rev(func: Callable, primals: PyTree, tangents: PyTree) -> PyTree:
+    r"""Compute the Hessian-vector product (HVP) via reverse-over-reverse mode.
+
+    Instead of pushing the tangents forward through the gradient (as in `hvp`), this
+    pulls them back through the gradient using a vector-Jacobian product. Since the
+    Hessian is symmetric, both compositions yield the same result, but this one can be
+    faster for models built from primitives with cheap VJPs and expensive (or missing)
+    JVP rules.
+
+    Args:
+        func: The scalar function for which the HVP is computed.
+        primals: The point at which the gradient and Hessian are evaluated.
+        tangents: The vector to multiply with the Hessian.
+
+    Returns:
+        The Hessian-vector product.
+    """
+    return _vjp_of_grad(jax.grad(func), primals, tangents)
+
+
+def _jvp_of_grad(grad_fn: Callable, primals: PyTree, tangents: PyTree) -> PyTree:
+    return jax.jvp(grad_fn, (primals,), (tangents,))[1]
+
+
+def _vjp_of_grad(grad_fn: Callable, primals: PyTree, tangents: PyTree) -> PyTree:
+    _, vjp_fn = jax.vjp(grad_fn, primals)
+    return vjp_fn(tangents)[0]
+
+
+def _get_grad_product_fn(
+    hvp_mode: HVPMode | str,
+) -> Callable[[Callable, PyTree, PyTree], PyTree]:
+    """Select how tangents are multiplied with the Jacobian of a gradient function.
+
+    The product is taken with an already constructed gradient function, so that
+    `jax.grad` does not need to be re-applied per HVP.
+
+    Args:
+        hvp_mode: The order in which automatic differentiation is composed. Supported
+            options are:
+            - `HVPMode.FWD_OVER_REV` for forward-over-reverse mode (as in `hvp`).
+            - `HVPMode.REV_OVER_REV` for reverse-over-reverse mode (as in
+              `hvp_rev_over_rev`).
+
+    Returns:
+        The corresponding gradient-Jacobian-vector product function.
+
+    Raises:
+        ValueError: If the mode is not supported.
+    """
+    if hvp_mode == HVPMode.FWD_OVER_REV:
+        return _jvp_of_grad
+
+    if hvp_mode == HVPMode.REV_OVER_REV:
+        return _vjp_of_grad
+
+    msg = f"unknown hvp mode: {hvp_mode}"
+    raise ValueError(msg)
+
+
+def _mse_loss(pred: Num[Array, "..."], target: Num[Array, "..."]) -> Num[Array, ""]:
+    return jnp.sum((pred - target) ** 2)
+
+
+def _cross_entropy_loss(
+    logits: Num[Array, "... C"], target: Int[Array, "..."] | Num[Array, "... C"]
+) -> Num[Array, ""]:
+    log_prob = jax.nn.log_softmax(logits, axis=-1)
+
+    # One-hot or soft labels
+    if jnp.issubdtype(target.dtype, jnp.floating):
+        return -jnp.sum(target * log_prob)
+
+    return -jnp.sum(jnp.take_along_axis(log_prob, target[..., None], axis=-1))
+
+
+_LOSS_FNS: dict[str, Callable] = {
+    LossFn.MSE: _mse_loss,
+    LossFn.CROSSENTROPY: _cross_entropy_loss,
+}
 
 
 def concatenate_model_and_loss_fn(
-    model_fn: ModelFn,  # type: ignore[reportRedeclaration]
+    model_fn: ModelFn,
     loss_fn: LossFn | str | Callable,
     *,
     has_batch: bool = False,
@@ -69,7 +158,8 @@ def concatenate_model_and_loss_fn(
 
     This creates a new function that evaluates the model and applies the specified
     loss function. If `has_batch` is `True`, the model function is vectorized over
-    the batch dimension using `jax.vmap`.
+    the batch dimension using `jax.vmap`. The loss function is resolved once at
+    construction.
 
     Mathematically, the combined function computes:
     $L(x, y, \theta) = \text{loss}(f(x, \theta), y)$, where $f$ is the model function,
@@ -78,47 +168,154 @@ def concatenate_model_and_loss_fn(
     Args:
         model_fn: The model function to evaluate.
         loss_fn: The loss function to apply. Supported options are:
-            - `LossFn.MSE` for mean squared error.
-            - `LossFn.CROSSENTROPY` for cross-entropy loss.
+            - `LossFn.MSE` for (summed) squared error.
+            - `LossFn.CROSSENTROPY` for (summed) softmax cross-entropy loss with
+              either integer class labels or one-hot/soft labels as targets.
             - A custom callable loss function.
         has_batch: Whether the model function should be vectorized over the batch.
 
     Returns:
         A combined function that computes the loss for given inputs, targets, and
         parameters.
+
+    Raises:
+        ValueError: If the loss function is neither supported nor callable.
     """
-    if has_batch:
-        model_fn = jax.vmap(model_fn, in_axes=(0, None))
+    batched_model_fn = jax.vmap(model_fn, in_axes=(0, None)) if has_batch else model_fn
+
+    # Resolve the loss function once at construction time
+    if isinstance(loss_fn, str) and loss_fn in _LOSS_FNS:
+        resolved_loss_fn = _LOSS_FNS[loss_fn]
+    elif callable(loss_fn):
+        resolved_loss_fn = loss_fn
+    else:
+        msg = f"unknown loss function: {loss_fn}"
+        raise ValueError(msg)
+
+    def loss_wrapper(
+        input: InputArray, target: TargetArray, params: Params
+    ) -> Num[Array, "..."]:
+        return resolved_loss_fn(batched_model_fn(input, params), target)
+
+    return loss_wrapper
 
-    if loss_fn == LossFn.MSE:
 
-        def loss_wrapper(
-            input: InputArray, target: TargetArray, params: Params
-        ) -> Num[Array, "..."]:
-            return jnp.sum((model_fn(input, params) - target) ** 2)
+def _cast_floating(tree: PyTree, dtype: DType | None) -> PyTree:
+    """Cast all floating-point leaves of a PyTree to `dtype`.
 
-        return loss_wrapper
+    Integer leaves (e.g., class labels or token ids) are left untouched.
 
-    if loss_fn == LossFn.CROSSENTROPY:
+    Returns:
+        The PyTree with its floating-point leaves cast, or the unchanged PyTree if
+        `dtype` is None.
+    """
+    if dtype is None:
+        return tree
+    return jax.tree.map(
+        lambda x: x.astype(dtype) if jnp.issubdtype(x.dtype, jnp.floating) else x,
+        tree,
+    )
 
-        def loss_wrapper(
-            input: InputArray, target: TargetArray, params: Params
-        ) -> Num[Array, "..."]:
-            return log_sigmoid_cross_entropy(model_fn(input, params), target)
 
-        return loss_wrapper
+def _shape_dtype_struct(tree: PyTree) -> PyTree:
+    return jax.tree.map(lambda x: jax.ShapeDtypeStruct(x.shape, x.dtype), tree)
 
-    if callable(loss_fn):
 
-        def loss_wrapper(
-            input: InputArray, target: TargetArray, params: Params
-        ) -> Num[Array, "..."]:
-            return loss_fn(model_fn(input, params), target)
+def _copy_aliased_leaves(tree: PyTree, other: PyTree) -> PyTree:
+    """Copy the leaves of a PyTree that are also leaves of `other`.
 
-        return loss_wrapper
+    A buffer cannot be donated to a call that also receives it as another argument,
+    e.g., when the parameters themselves are used as the vector of a donating HVP.
 
-    msg = f"unknown loss function: {loss_fn}"
-    raise ValueError(msg)
+    Returns:
+        The PyTree with its leaves shared with `other` replaced by copies.
+    """
+    other_ids = {id(leaf) for leaf in jax.tree.leaves(other)}
+    return jax.tree.map(lambda x: jnp.copy(x) if id(x) in other_ids else x, tree)
+
+
+def _create_hessian_mv_at(
+    model_fn: ModelFn,  # type: ignore[reportRedeclaration]
+    loss_fn: LossFn | str | Callable,
+    factor: Float,
+    *,
+    has_batch: bool,
+    hvp_mode: HVPMode | str,
+    dtype: DType | None,
+    remat_policy: Callable | None,
+) -> Callable[[Params, Params, Data], Params]:
+    """Create the HVP as a pure function of parameters, vector and data.
+
+    The parameters are an explicit argument, so they are not baked into compiled
+    graphs as constants when the returned function is transformed with `jax.jit`.
+    If `dtype` is given, the model and loss are evaluated with parameters and inputs
+    cast to it, while the HVP is returned in the dtype of the vector. If
+    `remat_policy` is given, the loss is wrapped in `jax.checkpoint` with this policy.
+
+    Returns:
+        A function computing the HVP for given parameters, vector and batch of data.
+    """
+    new_model_fn: Callable[[InputArray, TargetArray, Params], Num[Array, "..."]]  # noqa: UP037
+
+    new_model_fn = concatenate_model_and_loss_fn(model_fn, loss_fn, has_batch=has_batch)
+    grad_product_fn = _get_grad_product_fn(hvp_mode)
+
+    def loss_at(input: InputArray, target: TargetArray, params: Params):
+        return new_model_fn(
+            _cast_floating(input, dtype), target, _cast_floating(params, dtype)
+        )
+
+    if remat_policy is not None:
+        loss_at = jax.checkpoint(loss_at, policy=remat_policy)
+
+    # Apply the gradient transform once, instead of once per HVP
+    grad_fn = jax.grad(loss_at, argnums=2)
+
+    def _hessian_mv_at(params: Params, vec: Params, data: Data) -> Params:
+        result = grad_product_fn(
+            lambda p: grad_fn(data["input"], data["target"], p),
+            params,
+            vec,
+        )
+        result = jax.tree.map(lambda r, v: r.astype(v.dtype), result, vec)
+        return mul(factor, result)
+
+    return _hessian_mv_at
+
+
+def _jit_hessian_mv_at(
+    model_fn: ModelFn,  # type: ignore[reportRedeclaration]
+    loss_fn: LossFn | str | Callable,
+    factor: Float,
+    *,
+    has_batch: bool,
+    hvp_mode: HVPMode | str,
+    dtype: DType | None,
+    remat_policy: Callable | None,
+    batched: bool,
+    donate: bool,
+) -> Callable[[Params, Params, Data], Params]:
+    """Create the jitted HVP as a function of parameters, vector and data.
+
+    A new `jax.jit` object is created per construction. Its compilations are cached
+    per shape and dtype of the arguments, so one constructed HVP can be reused for
+    different batches of the same shape without re-tracing.
+
+    Returns:
+        The jitted HVP, optionally vectorized over a leading axis of the vector.
+    """
+    hessian_mv_at = _create_hessian_mv_at(
+        model_fn,
+        loss_fn,
+        factor,
+        has_batch=has_batch,
+        hvp_mode=hvp_mode,
+        dtype=dtype,
+        remat_policy=remat_policy,
+    )
+    if batched:
+        hessian_mv_at = jax.vmap(hessian_mv_at, in_axes=(None, 0, None))
+    return jax.jit(hessian_mv_at, donate_argnums=(1,) if donate else ())
 
 
 def create_hessian_mv_without_data(
@@ -128,6 +325,11 @@ def create_hessian_mv_without_data(
     factor: Float,
     *,
     has_batch: bool = False,
+    hvp_mode: HVPMode | str = HVPMode.FWD_OVER_REV,
+    dtype: DType | None = None,
+    remat_policy: Callable | None = None,
+    donate: bool = False,
+    precompile_for: Data | None = None,
     **kwargs,
 ) -> Callable[[Params, Data], Params]:
     r"""Computes the Hessian-vector product (HVP) for a model and loss function.
@@ -143,35 +345,143 @@ def create_hessian_mv_without_data(
         model_fn: The model function to evaluate.
         params: The parameters of the model.
         loss_fn: The loss function to apply. Supported options are:
-            - `LossFn.MSE` for mean squared error.
-            - `LossFn.CROSSENTROPY` for cross-entropy loss.
+            - `LossFn.MSE` for (summed) squared error.
+            - `LossFn.CROSSENTROPY` for (summed) softmax cross-entropy loss.
             - A custom callable loss function.
         factor: Scaling factor for the Hessian computation.
         has_batch: Whether the model function should be vectorized over the batch.
+        hvp_mode: The order in which automatic differentiation is composed (see
+            `HVPMode`). Defaults to forward-over-reverse mode.
+        dtype: Floating-point dtype in which the model and loss are evaluated, e.g.,
+            `jnp.bfloat16` to use faster low-precision matrix multiplications. The
+            HVP is returned in the dtype of the input vector. Defaults to None, in
+            which case no casting is applied.
+        remat_policy: Rematerialization policy for `jax.checkpoint`, e.g.,
+            `jax.checkpoint_policies.dots_with_no_batch_dims_saveable`. The loss is
+            then checkpointed, trading recomputation of activations for lower peak
+            memory. Defaults to None, in which case no rematerialization is applied.
+        donate: Whether to donate the buffer of the input vector to the computation,
+            so that XLA can reuse it for the result. This saves one allocation per
+            call, e.g., in iterative solvers, but the input vector must not be used
+            after the call. Leaves of the vector that are leaves of `params` are
+            copied before the call instead of being donated. Defaults to False.
+        precompile_for: A batch of data (or a PyTree of `jax.ShapeDtypeStruct`) for
+            which the HVP is lowered and compiled ahead of time, i.e., during
+            construction instead of at the first call. Calls with other shapes and
+            dtypes are still compiled lazily. Defaults to None, in which case the HVP
+            is only compiled lazily.
         **kwargs: Additional arguments (ignored).
 
     Returns:
-        A function that computes the HVP for a given vector and batch of data.
+        A function that computes the HVP for a given vector and batch of data. The
+        product is compiled once per shape and dtype of the data batch.
     """
     del kwargs
 
-    new_model_fn: Callable[[InputArray, TargetArray, Params], Num[Array, "..."]]  # noqa: UP037
+    hessian_mv_at = _jit_hessian_mv_at(
+        model_fn,
+        loss_fn,
+        factor,
+        has_batch=has_batch,
+        hvp_mode=hvp_mode,
+        dtype=dtype,
+        remat_policy=remat_policy,
+        batched=False,
+        donate=donate,
+    )
 
-    new_model_fn = concatenate_model_and_loss_fn(model_fn, loss_fn, has_batch=has_batch)
+    # Warm the compilation cache, but keep the jitted function, so that the HVP can
+    # still be traced by enclosing transformations (e.g., `jax.lax.map`)
+    if precompile_for is not None:
+        hessian_mv_at.lower(
+            params,
+            _shape_dtype_struct(params),
+            _shape_dtype_struct(precompile_for),
+        ).compile()
 
     def _hessian_mv(vec: Params, data: Data) -> Params:
-        return mul(
-            factor,
-            hvp(
-                lambda p: new_model_fn(data["input"], data["target"], p),
-                params,
-                vec,
-            ),
-        )
+        if donate:
+            vec = _copy_aliased_leaves(vec, params)
+        return hessian_mv_at(params, vec, data)
 
     return _hessian_mv
 
 
+def create_batched_hessian_mv_without_data(
+    model_fn: ModelFn,  # type: ignore[reportRedeclaration]
+    params: Params,
+    loss_fn: LossFn | str | Callable,
+    factor: Float,
+    *,
+    has_batch: bool = False,
+    hvp_mode: HVPMode | str = HVPMode.FWD_OVER_REV,
+    dtype: DType | None = None,
+    remat_policy: Callable | None = None,
+    donate: bool = False,
+    **kwargs,
+) -> Callable[[Params, Data], Params]:
+    r"""Computes Hessian-vector products (HVPs) for a stack of vectors at once.
+
+    This is the vectorized counterpart of `create_hessian_mv_without_data`: the
+    HVP is mapped over the leading axis of the vectors using `jax.vmap`, so that $k$
+    products run as a single compiled call, e.g., inside block-Krylov methods or
+    stochastic trace estimators.
+
+    Vectors given as a list of PyTrees can be stacked before calling via
+    `jax.tree.map(lambda *xs: jnp.stack(xs), *vecs)`.
+
+    Args:
+        model_fn: The model function to evaluate.
+        params: The parameters of the model.
+        loss_fn: The loss function to apply. Supported options are:
+            - `LossFn.MSE` for (summed) squared error.
+            - `LossFn.CROSSENTROPY` for (summed) softmax cross-entropy loss.
+            - A custom callable loss function.
+        factor: Scaling factor for the Hessian computation.
+        has_batch: Whether the model function should be vectorized over the batch.
+        hvp_mode: The order in which automatic differentiation is composed (see
+            `HVPMode`). Defaults to forward-over-reverse mode.
+        dtype: Floating-point dtype in which the model and loss are evaluated, e.g.,
+            `jnp.bfloat16` to use faster low-precision matrix multiplications. The
+            HVP is returned in the dtype of the input vector. Defaults to None, in
+            which case no casting is applied.
+        remat_policy: Rematerialization policy for `jax.checkpoint`, e.g.,
+            `jax.checkpoint_policies.dots_with_no_batch_dims_saveable`. The loss is
+            then checkpointed, trading recomputation of activations for lower peak
+            memory. Defaults to None, in which case no rematerialization is applied.
+        donate: Whether to donate the buffer of the input vector to the computation,
+            so that XLA can reuse it for the result. This saves one allocation per
+            call, e.g., in iterative solvers, but the input vector must not be used
+            after the call. Leaves of the vector that are leaves of `params` are
+            copied before the call instead of being donated. Defaults to False.
+        **kwargs: Additional arguments (ignored).
+
+    Returns:
+        A function that takes vectors stacked along a leading axis of size $k$ and a
+        batch of data, and returns the $k$ HVPs stacked along the same axis.
+    """
+    del kwargs
+
+    batched_hessian_mv_at = _jit_hessian_mv_at(
+        model_fn,
+        loss_fn,
+        factor,
+        has_batch=has_batch,
+        hvp_mode=hvp_mode,
+        dtype=dtype,
+        remat_policy=remat_policy,
+        batched=True,
+        donate=donate,
+    )
+
+    def _batched_hessian_mv(vecs: Params, data: Data) -> Params:
+        if donate:
+            vecs = _copy_aliased_leaves(vecs, params)
+        return batched_hessian_mv_at(params, vecs, data)
+
+    return _batched_hessian_mv
+
+
 def create_hessian_mv(
     model_fn: ModelFn,  # type: ignore[reportRedeclaration]
     params: Params,
@@ -179,6 +489,8 @@ def create_hessian_mv(
     loss_fn: LossFn | str | Callable,
     num_curv_samples: Int | None = None,
     num_total_samples: Int | None = None,
+    *,
+    precompile: bool = False,
     **kwargs,
 ) -> Callable[[Params], Params]:
     r"""Computes the Hessian-vector product (HVP) for a model and loss fn. with data.
@@ -195,8 +507,8 @@ def create_hessian_mv(
         params: The parameters of the model.
         data: A batch of input and target data.
         loss_fn: The loss function to apply. Supported options are:
-            - `LossFn.MSE` for mean squared error.
-            - `LossFn.CROSSENTROPY` for cross-entropy loss.
+            - `LossFn.MSE` for (summed) squared error.
+            - `LossFn.CROSSENTROPY` for (summed) softmax cross-entropy loss.
             - A custom callable loss function.
         num_curv_samples: Number of samples used to calculate the Hessian. Defaults to
             None, in which case it is inferred from `data` as its batch size. Note that
@@ -205,6 +517,9 @@ def create_hessian_mv(
         num_total_samples: Number of total samples the model was trained on. See the
             remark in `num_ggn_samples`'s description. Defaults to None, in which case
             it is set to equal `num_ggn_samples`.
+        precompile: Whether to compile the HVP for `data` ahead of time during
+            construction (see `precompile_for` in `create_hessian_mv_without_data`).
+            Defaults to False.
         **kwargs: Additional arguments.
 
     Returns:
@@ -220,11 +535,16 @@ def create_hessian_mv(
 
     curv_scaling_factor = num_total_samples / num_curv_samples
 
+    precompile_for = kwargs.pop("precompile_for", None)
+    if precompile:
+        precompile_for = data
+
     hessian_mv = create_hessian_mv_without_data(
         model_fn=model_fn,
         params=params,
         loss_fn=loss_fn,
         factor=curv_scaling_factor,
+        precompile_for=precompile_for,
         **kwargs,
     )
 
@@ -232,3 +552,156 @@ def create_hessian_mv(
         return hessian_mv(vec, data)
 
     return wrapped_hessian_mv
+
+
+def create_dataset_hessian_mv(
+    model_fn: ModelFn,  # type: ignore[reportRedeclaration]
+    params: Params,
+    data: Data,
+    loss_fn: LossFn | str | Callable,
+    num_curv_samples: Int | None = None,
+    num_total_samples: Int | None = None,
+    *,
+    batch_size: Int,
+    hvp_mode: HVPMode | str = HVPMode.FWD_OVER_REV,
+    has_batch: bool = False,
+    dtype: DType | None = None,
+    remat_policy: Callable | None = None,
+    **kwargs,
+) -> Callable[[Params], Params]:
+    r"""Computes the Hessian-vector product (HVP) summed over a whole dataset.
+
+    Unlike `create_hessian_mv`, the dataset is not processed at once. It is split
+    into minibatches of size `batch_size` along its leading axis, whose HVPs are
+    accumulated with `jax.lax.scan`. This bounds the memory to that of a single
+    minibatch, while the whole pass over the dataset is compiled into one executable.
+    If the dataset size is not divisible by `batch_size`, the remaining samples are
+    processed as one additional, smaller batch.
+
+    Mathematically: $H \cdot v = \sum_b \nabla^2 L(x_b, y_b, \theta) \cdot v$, where
+    $b$ runs over the minibatches.
+
+    Args:
+        model_fn: The model function to evaluate.
+        params: The parameters of the model.
+        data: The dataset of input and target data with a leading sample axis.
+        loss_fn: The loss function to apply. Supported options are:
+            - `LossFn.MSE` for (summed) squared error.
+            - `LossFn.CROSSENTROPY` for (summed) softmax cross-entropy loss.
+            - A custom callable loss function.
+        num_curv_samples: Number of samples used to calculate the Hessian. Defaults to
+            None, in which case it is inferred from `data` as its size.
+        num_total_samples: Number of total samples the model was trained on. Defaults
+            to None, in which case it is set to equal `num_curv_samples`.
+        batch_size: Number of samples per minibatch.
+        hvp_mode: The order in which automatic differentiation is composed (see
+            `HVPMode`). Defaults to forward-over-reverse mode.
+        has_batch: Whether the model function should be vectorized over the batch.
+        dtype: Floating-point dtype in which the model and loss are evaluated (see
+            `create_hessian_mv_without_data`). Defaults to None.
+        remat_policy: Rematerialization policy for `jax.checkpoint` (see
+            `create_hessian_mv_without_data`). Defaults to None.
+        **kwargs: Additional arguments (ignored).
+
+    Returns:
+        A function that computes the HVP for a given vector and the fixed dataset.
+
+    Note: Data sharded across devices (e.g., via `jax.device_put` with a
+    `NamedSharding`) is handled by `jax.jit`'s sharding propagation.
+    """
+    del kwargs
+
+    num_samples = data["input"].shape[0]
+    if num_curv_samples is None:
+        num_curv_samples = num_samples
+
+    if num_total_samples is None:
+        num_total_samples = num_curv_samples
+
+    curv_scaling_factor = num_total_samples / num_curv_samples
+
+    hessian_mv_at = _create_hessian_mv_at(
+        model_fn,
+        loss_fn,
+        curv_scaling_factor,
+        has_batch=has_batch,
+        hvp_mode=hvp_mode,
+        dtype=dtype,
+        remat_policy=remat_policy,
+    )
+    num_batches, remainder = divmod(num_samples, batch_size)
+
+    @jax.jit
+    def _dataset_hessian_mv_at(params: Params, vec: Params, data: Data) -> Params:
+        batches = jax.tree.map(
+            lambda x: x[: num_batches * batch_size].reshape(
+                num_batches, batch_size, *x.shape[1:]
+            ),
+            data,
+        )
+
+        def accumulate(acc: Params, batch: Data) -> tuple[Params, None]:
+            return add(acc, hessian_mv_at(params, vec, batch)), None
+
+        result, _ = jax.lax.scan(accumulate, zeros_like(vec), batches)
+
+        if remainder > 0:
+            tail = tree_slice(data, num_batches * batch_size, num_samples)
+            result = add(result, hessian_mv_at(params, vec, tail))
+
+        return result
+
+    def wrapped_hessian_mv(vec: Params) -> Params:
+        return _dataset_hessian_mv_at(params, vec, data)
+
+    return wrapped_hessian_mv
+
+
+def create_hessian_diag(
+    model_fn: ModelFn,  # type: ignore[reportRedeclaration]
+    params: Params,
+    data: Data,
+    loss_fn: LossFn | str | Callable,
+    num_curv_samples: Int | None = None,
+    num_total_samples: Int | None = None,
+    **kwargs,
+) -> FlatParams:
+    r"""Computes the diagonal of the Hessian for a model and loss function with data.
+
+    The diagonal is extracted from HVPs with the canonical basis vectors, i.e.,
+    $\text{diag}(H)_i = e_i^\top H e_i$. The HVPs are mapped over all basis vectors
+    in a single compiled `jax.lax.map`, which can be vectorized in batches via the
+    `diagonal_batch_size` keyword argument (default: 1).
+
+    Args:
+        model_fn: The model function to evaluate.
+        params: The parameters of the model.
+        data: A batch of input and target data.
+        loss_fn: The loss function to apply. Supported options are:
+            - `LossFn.MSE` for (summed) squared error.
+            - `LossFn.CROSSENTROPY` for (summed) softmax cross-entropy loss.
+            - A custom callable loss function.
+        num_curv_samples: Number of samples used to calculate the Hessian (see
+            `create_hessian_mv`).
+        num_total_samples: Number of total samples the model was trained on (see
+            `create_hessian_mv`).
+        **kwargs: Additional arguments passed to `create_hessian_mv` and
+            `diagonal`.
+
+    Returns:
+        The diagonal of the Hessian as a flat array.
+    """
+    hessian_mv = create_hessian_mv(
+        model_fn=model_fn,
+        params=params,
+        data=data,
+        loss_fn=loss_fn,
+        num_curv_samples=num_curv_samples,
+        num_total_samples=num_total_samples,
+        **kwargs,
+    )
+
+    # Map over the basis vectors instead of unrolling one HVP per parameter
+    kwargs.setdefault("diagonal_batch_size", 1)
+
+    return diagonal(hessian_mv, layout=params, **kwargs)
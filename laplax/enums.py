@@ -14,6 +14,11 @@ class CurvApprox(StrEnum):
     LOW_RANK = "low_rank"
 
 
+class HVPMode(StrEnum):
+    FWD_OVER_REV = "fwd_over_rev"
+    REV_OVER_REV = "rev_over_rev"
+
+
 class CalibrationErrorNorm(StrEnum):
     L1 = "l1"
     INF = "inf"
@@ -15,9 +15,14 @@ These utilities streamline dataset evaluation workflows and ensure flexibility i
 computation and result aggregation.
 """
 
+import inspect
+import operator
+
 import jax
+import jax.numpy as jnp
 
 from laplax.types import Any, Array, Callable, Data, InputArray
+from laplax.util.tree import tree_slice
 from laplax.util.utils import identity
 
 
@@ -103,6 +108,62 @@ def finalize_fns(
     return results
 
 
+def _specialize_metric(fn: Callable) -> Callable[[dict[str, Array]], Array]:
+    """Specialize a metric to the keyword arguments its signature accepts.
+
+    The signature is inspected once, so that each evaluation only forwards the
+    predictions the metric asks for. Metrics accepting `**kwargs` (or whose signature
+    cannot be inspected) receive all predictions.
+
+    Args:
+        fn: A metric callable taking predictions and target as keyword arguments.
+
+    Returns:
+        A callable that takes the dictionary of predictions and target, and returns
+        the metric.
+    """
+    try:
+        params = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return lambda pred: fn(**pred)
+
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params):
+        return lambda pred: fn(**pred)
+
+    names = tuple(
+        p.name
+        for p in params
+        if p.kind
+        in {inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY}
+    )
+    return lambda pred: fn(**{name: pred[name] for name in names if name in pred})
+
+
+def _create_metrics_data_point_fn(
+    pred_fn: Callable[[InputArray], dict[str, Array]],
+    metrics: dict[str, Callable],
+) -> Callable[[Data], dict[str, Array]]:
+    """Create a function evaluating a set of metrics on a single data point.
+
+    Args:
+        pred_fn: A callable that takes an input array and returns predictions
+            as a dictionary.
+        metrics: A dictionary of metrics to compute, where keys are metric
+            names and values are callables.
+
+    Returns:
+        A callable that takes a data point and returns a dictionary of its metrics.
+    """
+    # Specialize metrics to their arguments
+    metrics = {name: _specialize_metric(fn) for name, fn in metrics.items()}
+
+    def evaluate_data_point(dp: Data) -> dict[str, Array]:
+        pred = {**pred_fn(dp["input"]), "target": dp["target"]}
+        return {name: fn(pred) for name, fn in metrics.items()}
+
+    return evaluate_data_point
+
+
 def evaluate_on_dataset(
     pred_fn: Callable[[InputArray], dict[str, Array]], data: Data, **kwargs
 ) -> dict:
@@ -157,7 +218,9 @@ def evaluate_metrics_on_dataset(
         data: A dataset, where each data point is a dictionary containing
             "input" and "target".
         metrics: A dictionary of metrics to compute, where keys are metric
-            names and values are callables.
+            names and values are callables. Each metric receives the predictions
+            and target as keyword arguments, restricted to those in its signature
+            unless it accepts `**kwargs`.
         apply: A callable to transform the evaluated metrics (default: identity).
         **kwargs: Additional arguments, including:
             - `evaluate_metrics_on_dataset_batch_size`: Batch size for processing data
@@ -167,13 +230,8 @@ def evaluate_metrics_on_dataset(
         dict: A dictionary containing the evaluated metrics for the entire
         dataset.
     """
-    # Wrap metrics
-    metrics = {name: named_finalize_fn_wrapper(fn) for name, fn in metrics.items()}
-
     # Setup pointwise evaluation
-    def evaluate_data_point(dp: Data) -> dict[str, Array]:
-        pred = {**pred_fn(dp["input"]), "target": dp["target"]}
-        return named_finalize_fns(fns=metrics, results={}, aux=None, **pred)
+    evaluate_data_point = _create_metrics_data_point_fn(pred_fn, metrics)
 
     # Evaluate metrics
     evaluated_metrics = jax.lax.map(
@@ -184,3 +242,80 @@ def evaluate_metrics_on_dataset(
         ),
     )
     return {metric: apply(evaluated_metrics[metric]) for metric in evaluated_metrics}
+
+
+def evaluate_mean_metrics_on_dataset(
+    pred_fn: Callable[[InputArray], dict[str, Array]],
+    data: Data,
+    *,
+    metrics: dict[str, Callable],
+    **kwargs,
+) -> dict:
+    """Evaluate the mean of a set of metrics over a dataset.
+
+    In contrast to `evaluate_metrics_on_dataset` with a mean as `apply`, the
+    pointwise metrics are never materialized for the whole dataset. Instead, the
+    dataset is processed in batches via `jax.lax.scan`, accumulating running sums of
+    the metrics, such that memory does not grow with the dataset size. If the dataset
+    size is not divisible by the batch size, the remaining data points are processed
+    as one additional, smaller batch.
+
+    Args:
+        pred_fn: A callable that takes an input array and returns predictions
+            as a dictionary.
+        data: A dataset, where each data point is a dictionary containing
+            "input" and "target".
+        metrics: A dictionary of metrics to compute, where keys are metric
+            names and values are callables (see `evaluate_metrics_on_dataset`).
+        **kwargs: Additional arguments, including:
+            - `evaluate_metrics_on_dataset_batch_size`: Batch size for processing data
+              (default: `data_batch_size`, or 1 if neither is given).
+
+    Returns:
+        dict: A dictionary containing the mean of each metric over the dataset.
+    """
+    batch_size = (
+        kwargs.get(
+            "evaluate_metrics_on_dataset_batch_size", kwargs.get("data_batch_size")
+        )
+        or 1
+    )
+
+    # Setup pointwise evaluation
+    evaluate_data_point = _create_metrics_data_point_fn(pred_fn, metrics)
+
+    # Split dataset into full batches and a remainder
+    num_points = jax.tree.leaves(data)[0].shape[0]
+    num_batches, remainder = divmod(num_points, batch_size)
+    batches = jax.tree.map(
+        lambda x: x[: num_batches * batch_size].reshape(
+            num_batches, batch_size, *x.shape[1:]
+        ),
+        data,
+    )
+
+    # Accumulate metric sums
+    def add_batch(sums: dict[str, Array], batch: Data) -> dict[str, Array]:
+        batch_metrics = jax.vmap(evaluate_data_point)(batch)
+        return jax.tree.map(
+            lambda x, acc: acc + jnp.sum(x, axis=0).astype(acc.dtype),
+            batch_metrics,
+            sums,
+        )
+
+    def accumulate(
+        sums: dict[str, Array], batch: Data
+    ) -> tuple[dict[str, Array], None]:
+        return add_batch(sums, batch), None
+
+    # Accumulate in floating point, e.g., for boolean or integer metrics
+    init = jax.tree.map(
+        lambda x: jnp.zeros(x.shape, jnp.result_type(x.dtype, jnp.float32)),
+        jax.eval_shape(evaluate_data_point, jax.tree.map(operator.itemgetter(0), data)),
+    )
+    sums, _ = jax.lax.scan(accumulate, init, batches)
+
+    if remainder > 0:
+        sums = add_batch(sums, tree_slice(data, num_batches * batch_size, num_points))
+
+    return jax.tree.map(lambda x: x / num_points, sums)
@@ -14,7 +14,9 @@ from laplax.util.tree import (
 )
 
 
-def diagonal(mv: Callable | jnp.ndarray, layout: Layout | None = None) -> Array:
+def diagonal(
+    mv: Callable | jnp.ndarray, layout: Layout | None = None, **kwargs
+) -> Array:
     """Compute the diagonal of a matrix represented by a matrix-vector product function.
 
     This function extracts the diagonal of a matrix using basis vectors and a
@@ -30,6 +32,11 @@ def diagonal(mv: Callable | jnp.ndarray, layout: Layout | None = None) -> Array:
             - PyTree: A structure to generate basis vectors matching the matrix
                 dimensions.
             - None: If `mv` is a dense matrix.
+        **kwargs: Additional options:
+            - `diagonal_batch_size`: Batch size for applying the MVP function. If
+              given, the MVPs are computed in a single `jax.lax.map` instead of an
+              unrolled loop over the basis vectors, which compiles faster for large
+              sizes. Defaults to None (unrolled loop).
 
     Returns:
         jax.Array: An array representing the diagonal of the matrix.
@@ -61,9 +68,17 @@ def diagonal(mv: Callable | jnp.ndarray, layout: Layout | None = None) -> Array:
             return basis_vector_from_index(idx, layout)
 
     # Compute the diagonal using basis vectors
-    return jnp.stack([
-        util.tree.tree_vec_get(mv(get_basis_vec(i)), i) for i in range(size)
-    ])
+    def get_diag_entry(idx: int) -> Array:
+        # Flatten leaves first, so that `idx` selects an element of N-d arrays
+        return util.tree.tree_vec_get(
+            jax.tree.map(jnp.ravel, mv(get_basis_vec(idx))), idx
+        )
+
+    batch_size = kwargs.get("diagonal_batch_size")
+    if batch_size is None:
+        return jnp.stack([get_diag_entry(i) for i in range(size)])
+
+    return jax.lax.map(get_diag_entry, jnp.arange(size), batch_size=batch_size)
 
 
 def to_dense(mv: Callable, layout: Layout, **kwargs) -> Array:
@@ -6,7 +6,7 @@ import numpy as np
 from flax import nnx
 
 from laplax.curv.ggn import create_ggn_mv
-from laplax.curv.hessian import create_hessian_mv
+from laplax.curv.hessian import create_dataset_hessian_mv, create_hessian_mv
 from laplax.enums import LossFn
 from laplax.util.flatten import create_pytree_flattener, wrap_function
 from laplax.util.mv import to_dense
@@ -119,6 +119,23 @@ def test_hessian_linear_regression():
     # Compare results
     np.testing.assert_allclose(hessian_manual, hessian_calc, atol=5 * 1e-6)
 
+    # Compute the Hessian by accumulating over minibatches
+    dataset_hessian_mv = create_dataset_hessian_mv(
+        model_fn=model_fn,
+        params=params,
+        data={"input": X, "target": y},
+        loss_fn=LossFn.MSE,
+        num_total_samples=N,
+        batch_size=3,
+        has_batch=True,
+    )
+    dataset_hessian_calc = (
+        to_dense(dataset_hessian_mv, layout=params)
+        .swapaxes(0, 1)
+        .reshape(-1, D_out * D_in)
+    )
+    np.testing.assert_allclose(hessian_manual, dataset_hessian_calc, atol=5 * 1e-6)
+
 
 def test_hessian_linear_regression_2():
     D_in, D_out, N = 5, 3, 10
@@ -3,7 +3,13 @@ import jax.numpy as jnp
 import pytest
 import pytest_cases
 
-from laplax.curv.hessian import create_hessian_mv
+from laplax.curv.hessian import (
+    create_batched_hessian_mv_without_data,
+    create_hessian_diag,
+    create_hessian_mv,
+    create_hessian_mv_without_data,
+)
+from laplax.enums import LossFn
 
 from .cases.rosenbrock import RosenbrockCase
 
@@ -18,16 +24,172 @@ def case_rosenbrock(x, alpha):
     return RosenbrockCase(x, alpha)
 
 
+@pytest.mark.parametrize(
+    ("options", "rtol"),
+    [
+        ({}, 1e-5),
+        ({"dtype": jnp.bfloat16}, 5e-2),
+        ({"precompile": True}, 1e-5),
+        ({"precompile_for": {"input": jnp.zeros(1), "target": jnp.zeros(1)}}, 1e-5),
+        ({"donate": True}, 1e-5),
+    ],
+    ids=["default", "low_precision", "precompiled", "precompiled_for", "donated"],
+)
+@pytest.mark.parametrize(
+    "remat_policy", [None, jax.checkpoint_policies.nothing_saveable]
+)
+@pytest.mark.parametrize("hvp_mode", ["fwd_over_rev", "rev_over_rev"])
 @pytest_cases.parametrize_with_cases("rosenbrock", cases=[case_rosenbrock])
-def test_hessian_rosenbrock(rosenbrock):
+def test_hessian_rosenbrock(rosenbrock, hvp_mode, remat_policy, options, rtol):
+    num_traces = 0
+
+    def model_fn(input, params):
+        nonlocal num_traces
+        num_traces += 1  # Python side effects only run while tracing
+        return rosenbrock.model_fn(input, params)
+
     hessian_mv = create_hessian_mv(
-        model_fn=rosenbrock.model_fn,
+        model_fn=model_fn,
         params=rosenbrock.x,
         data={"input": jnp.zeros(1), "target": jnp.zeros(1)},
         loss_fn=rosenbrock.loss_fn,
         num_total_samples=1,
+        hvp_mode=hvp_mode,
+        remat_policy=remat_policy,
+        **options,
     )
 
+    # Precompilation traces during construction, and calls reuse that trace
+    precompiled = options.get("precompile") or "precompile_for" in options
+    assert (num_traces > 0) == bool(precompiled)
+    if precompiled:
+        num_traces_constructed = num_traces
+        hessian_mv(jnp.ones(2))
+        assert num_traces == num_traces_constructed
+
     hessian_calc = jax.lax.map(hessian_mv, jnp.eye(2))
     hessian_manual = rosenbrock.hessian_manual
-    assert jnp.allclose(hessian_calc, hessian_manual)
+    assert hessian_calc.dtype == jnp.float32
+    assert jnp.allclose(hessian_calc, hessian_manual, rtol=rtol)
+
+    if options.get("donate"):
+        v = jnp.ones(2)
+        hessian_mv(v)
+        assert v.is_deleted()
+
+        # The parameters themselves are copied instead of donated
+        hessian_params = hessian_mv(rosenbrock.x)
+        assert not rosenbrock.x.is_deleted()
+        assert jnp.allclose(hessian_params, hessian_manual @ rosenbrock.x, rtol=rtol)
+
+
+@pytest_cases.parametrize_with_cases("rosenbrock", cases=[case_rosenbrock])
+def test_batched_hessian_rosenbrock(rosenbrock):
+    batched_hessian_mv = create_batched_hessian_mv_without_data(
+        model_fn=rosenbrock.model_fn,
+        params=rosenbrock.x,
+        loss_fn=rosenbrock.loss_fn,
+        factor=1.0,
+    )
+
+    hessian_calc = batched_hessian_mv(
+        jnp.eye(2), {"input": jnp.zeros(1), "target": jnp.zeros(1)}
+    )
+    assert jnp.allclose(hessian_calc, rosenbrock.hessian_manual)
+
+
+@pytest_cases.parametrize_with_cases("rosenbrock", cases=[case_rosenbrock])
+def test_hessian_diag_rosenbrock(rosenbrock):
+    hessian_diag = create_hessian_diag(
+        model_fn=rosenbrock.model_fn,
+        params=rosenbrock.x,
+        data={"input": jnp.zeros(1), "target": jnp.zeros(1)},
+        loss_fn=rosenbrock.loss_fn,
+        num_total_samples=1,
+        diagonal_batch_size=2,
+    )
+
+    assert jnp.allclose(hessian_diag, jnp.diag(rosenbrock.hessian_manual))
+
+
+def test_hessian_diag_2d_params():
+    key = jax.random.split(jax.random.key(0), 3)
+    X = jax.random.normal(key[0], (8, 3))
+    y = jax.random.normal(key[1], (8, 2))
+    params = jax.random.normal(key[2], (2, 3))
+
+    def model_fn(input, params):
+        return jnp.tanh(params @ input)
+
+    def loss(params):
+        pred = jax.vmap(model_fn, in_axes=(0, None))(X, params)
+        return jnp.sum((pred - y) ** 2)
+
+    hessian_diag = create_hessian_diag(
+        model_fn=model_fn,
+        params=params,
+        data={"input": X, "target": y},
+        loss_fn=LossFn.MSE,
+        has_batch=True,
+    )
+
+    hessian_autodiff = jax.hessian(loss)(params).reshape(6, 6)
+    assert hessian_diag.shape == (6,)
+    assert jnp.allclose(hessian_diag, jnp.diag(hessian_autodiff), atol=1e-5)
+
+
+@pytest.mark.parametrize("one_hot", [False, True])
+def test_hessian_cross_entropy(one_hot):
+    key = jax.random.split(jax.random.key(0), 3)
+    X = jax.random.normal(key[0], (8, 4))
+    labels = jax.random.randint(key[1], (8,), 0, 3)
+    y = jax.nn.one_hot(labels, 3) if one_hot else labels
+    params = jax.random.normal(key[2], (3, 4))
+
+    def model_fn(input, params):
+        return params @ input
+
+    def loss(params):
+        logits = jax.vmap(model_fn, in_axes=(0, None))(X, params)
+        log_prob = jax.nn.log_softmax(logits, axis=-1)
+        return -jnp.sum(log_prob[jnp.arange(8), labels])
+
+    hessian_mv = create_hessian_mv(
+        model_fn=model_fn,
+        params=params,
+        data={"input": X, "target": y},
+        loss_fn=LossFn.CROSSENTROPY,
+        has_batch=True,
+    )
+
+    hessian_calc = jax.lax.map(
+        lambda v: hessian_mv(v.reshape(3, 4)).reshape(-1), jnp.eye(12)
+    )
+    hessian_autodiff = jax.hessian(loss)(params).reshape(12, 12)
+    assert jnp.allclose(hessian_calc, hessian_autodiff, atol=1e-5)
+
+
+def test_hessian_mv_reused_for_same_shaped_batches():
+    num_traces = 0
+
+    def model_fn(input, params):
+        nonlocal num_traces
+        num_traces += 1  # Python side effects only run while tracing
+        return params @ input
+
+    hessian_mv = create_hessian_mv_without_data(
+        model_fn=model_fn,
+        params=jnp.ones((2, 3)),
+        loss_fn=LossFn.MSE,
+        factor=1.0,
+        has_batch=True,
+    )
+
+    data = {"input": jnp.ones((4, 3)), "target": jnp.ones((4, 2))}
+    result = hessian_mv(jnp.ones((2, 3)), data)
+    num_traces_first = num_traces
+
+    # A same-shaped batch reuses the compiled HVP of this construction
+    result_2 = hessian_mv(jnp.ones((2, 3)), jax.tree.map(lambda x: 2 * x, data))
+    assert num_traces == num_traces_first
+    assert jnp.allclose(result_2, 4 * result)
@@ -1,13 +1,17 @@
 """Test for utility functions."""
 
 import jax
+import jax.numpy as jnp
 import pytest_cases
 
 from laplax.curv.cov import create_posterior_fn
 from laplax.curv.ggn import create_ggn_mv
-from laplax.eval.metrics import DEFAULT_REGRESSION_METRICS
+from laplax.eval.metrics import DEFAULT_REGRESSION_METRICS, correctness
 from laplax.eval.pushforward import set_lin_pushforward
-from laplax.eval.utils import evaluate_metrics_on_dataset
+from laplax.eval.utils import (
+    evaluate_mean_metrics_on_dataset,
+    evaluate_metrics_on_dataset,
+)
 
 from .cases.regression import case_regression
 
@@ -61,3 +65,46 @@ def test_eval_metrics(curv_op, task):
     assert all(results["q"] > 0)
     comparison = next(iter(results.values())).shape
     assert all(k.shape == comparison for k in results.values())
+
+
+def test_evaluate_mean_metrics_on_dataset():
+    data = {"input": jnp.arange(10.0).reshape(5, 2), "target": jnp.arange(5.0)}
+
+    def spread(pred_var, **kwargs):
+        del kwargs
+        return jnp.stack([pred_var, 2 * pred_var])
+
+    metrics = {"error": lambda pred, target: (pred - target) ** 2, "spread": spread}
+
+    def pred_fn(input):
+        return {"pred": input.sum(), "pred_var": input.var()}
+
+    results = evaluate_metrics_on_dataset(
+        pred_fn, data, metrics=metrics, apply=lambda x: x.mean(axis=0)
+    )
+    results_mean = evaluate_mean_metrics_on_dataset(
+        pred_fn, data, metrics=metrics, evaluate_metrics_on_dataset_batch_size=2
+    )
+
+    for key, value in results.items():
+        assert jnp.allclose(value, results_mean[key])
+
+
+def test_evaluate_mean_metrics_on_dataset_boolean_metric():
+    data = {
+        "input": jnp.array([[2.0, 0.0], [0.0, 1.0], [3.0, 1.0]]),
+        "target": jnp.array([0, 0, 0]),
+    }
+
+    def pred_fn(input):
+        return {"pred": input}
+
+    results = evaluate_mean_metrics_on_dataset(
+        pred_fn,
+        data,
+        metrics={"correctness": correctness},
+        evaluate_metrics_on_dataset_batch_size=2,
+    )
+
+    assert jnp.issubdtype(results["correctness"].dtype, jnp.floating)
+    assert jnp.allclose(results["correctness"], 2 / 3)